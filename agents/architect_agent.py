@@ -1,8 +1,9 @@
 from __future__ import annotations
-from typing import Dict, List
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
 from core.models import CircuitSpec, GeneratedDesign, PlacedPart
 from tools.openai_client import LLMClient
-import json
+from core import jsonio
 from kicad.library import resolve_lib_id
 from kicad.rag import candidates_for_parts
 
@@ -24,6 +25,10 @@ class ArchitectAgent:
     def __init__(self, use_llm: bool = False):
         self.use_llm = use_llm
         self.llm = LLMClient() if use_llm else None
+        self._allowed: Optional[Dict[str, List[str]]] = None
+        # (title, allowed, (ref, value) pairs, serialized) for the prompt block that is
+        # identical every iteration
+        self._static: Optional[Tuple[str, Dict[str, List[str]], tuple, str]] = None
 
     def _choose_symbol(self, part_type: str, fallback_symbol: str | None, value: str | None = None) -> str:
         if fallback_symbol:
@@ -47,50 +52,78 @@ class ArchitectAgent:
     def _extract_json(self, text: str) -> dict | None:
         if not text:
             return None
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            snippet = text[start : end + 1]
-            try:
-                return json.loads(snippet)
-            except Exception:
-                return None
-        return None
+        data = jsonio.extract_json_object(text)
+        return data if isinstance(data, dict) else None
+
+    def _static_json(self, design: GeneratedDesign, allowed: Dict[str, List[str]]) -> str:
+        values = tuple((p.ref, p.value) for p in design.parts)
+        cached = self._static
+        if cached is not None and cached[0] == design.title and cached[1] is allowed and cached[2] == values:
+            return cached[3]
+        text = jsonio.dumps(
+            {
+                "title": design.title,
+                "allowed_by_ref": allowed,
+                "value_by_ref": dict(values),
+            }
+        )
+        self._static = (design.title, allowed, values, text)
+        return text
+
+    def _dynamic_parts(self, design: GeneratedDesign) -> List[dict]:
+        return [
+            {"ref": p.ref, "current_lib_id": p.symbol, "position": list(p.position), "rotation": p.rotation}
+            for p in design.parts
+        ]
+
+    def _user_content(self, design: GeneratedDesign, allowed: Dict[str, List[str]], dynamic: dict) -> str:
+        # Static block first so the provider can reuse the longest possible cached prefix
+        return self._static_json(design, allowed) + "\n---\n" + jsonio.dumps(dynamic)
 
     def _apply_positions_and_symbols_from_json(self, design: GeneratedDesign, data: dict, allowed_by_ref: Dict[str, List[str]]) -> GeneratedDesign:
+        if not data:
+            return design
         by_ref = {p["ref"]: p for p in data.get("parts", []) if isinstance(p, dict) and "ref" in p}
-        updated = design.model_copy(deep=True)
-        for p in updated.parts:
+        # Copy-on-write: only parts named in the reply get a new PlacedPart
+        updated_parts = list(design.parts)
+        for i, p in enumerate(design.parts):
             entry = by_ref.get(p.ref)
-            if entry:
-                # lib_id selection (enforced against allowed list)
-                sel = entry.get("lib_id") or entry.get("symbol")
-                allowed = allowed_by_ref.get(p.ref, [])
-                if allowed:
-                    if sel in allowed:
-                        p.symbol = sel
-                    else:
-                        p.symbol = allowed[0]
-                elif isinstance(sel, str):
-                    p.symbol = sel
-                # position / rotation
-                pos = entry.get("position") or entry.get("pos")
-                if isinstance(pos, list) and len(pos) == 2:
-                    x, y = int(pos[0]), int(pos[1])
-                    p.position = (x, y)
-                    bx, by, bw, bh = p.bbox
-                    if bw == 0 or bh == 0:
-                        bw, bh = 18, 10
-                    p.bbox = (x - bw // 2, y - bh // 2, bw, bh)
-                rot = entry.get("rotation") or entry.get("rot")
-                if isinstance(rot, int):
-                    p.rotation = rot
+            if not entry:
+                continue
+            update: dict = {}
+            # lib_id selection (enforced against allowed list)
+            sel = entry.get("lib_id") or entry.get("symbol")
+            allowed = allowed_by_ref.get(p.ref, [])
+            if allowed:
+                if sel in allowed:
+                    update["symbol"] = sel
+                else:
+                    update["symbol"] = allowed[0]
+            elif isinstance(sel, str):
+                update["symbol"] = sel
+            # position / rotation
+            pos = entry.get("position") or entry.get("pos")
+            if isinstance(pos, list) and len(pos) == 2:
+                x, y = int(pos[0]), int(pos[1])
+                update["position"] = (x, y)
+                bx, by, bw, bh = p.bbox
+                if bw == 0 or bh == 0:
+                    bw, bh = 18, 10
+                update["bbox"] = (x - bw // 2, y - bh // 2, bw, bh)
+            rot = entry.get("rotation") or entry.get("rot")
+            if isinstance(rot, int):
+                update["rotation"] = rot
+            if update:
+                updated_parts[i] = replace(p, **update)
+        new_nets = list(design.nets)
+        nets_set = set(new_nets)
         nets = data.get("nets")
         if isinstance(nets, list):
             for n in nets:
-                if isinstance(n, str) and n not in updated.nets:
-                    updated.nets.append(n)
-        return updated
+                if isinstance(n, str) and n not in nets_set:
+                    nets_set.add(n)
+                    new_nets.append(n)
+        return GeneratedDesign(title=design.title, parts=updated_parts, nets=new_nets)
 
     def _base_design(self, circuit: CircuitSpec) -> GeneratedDesign:
         placed_parts: List[PlacedPart] = []
@@ -111,19 +144,23 @@ class ArchitectAgent:
                 )
             )
         nets = [n.name for n in circuit.nets]
+        nets_set = set(nets)
         for p in placed_parts:
             for net in p.pins.values():
-                if net and net not in nets:
+                if net and net not in nets_set:
+                    nets_set.add(net)
                     nets.append(net)
         return GeneratedDesign(title=circuit.title or "Untitled", parts=placed_parts, nets=nets)
 
-    def produce_design(self, circuit: CircuitSpec) -> GeneratedDesign:
+    def produce_design(self, circuit: CircuitSpec, allowed: Optional[Dict[str, List[str]]] = None) -> GeneratedDesign:
         base = self._base_design(circuit)
         if not self.use_llm or not self.llm:
             return base
 
-        # RAG: allowed lib_ids per part
-        allowed = candidates_for_parts(circuit.parts, max_per_lib=5)
+        # RAG: allowed lib_ids per part (callers that already have them pass them in)
+        if allowed is None:
+            allowed = candidates_for_parts(circuit.parts, max_per_lib=5)
+        self._allowed = allowed
 
         try:
             prompt = [
@@ -131,31 +168,17 @@ class ArchitectAgent:
                     "role": "system",
                     "content": (
                         "You are an EDA assistant. Choose a valid KiCad 9 symbol from the allowed list for each part and improve placement.\n"
+                        "Input: a JSON block {title, allowed_by_ref, value_by_ref}, a line '---', then a JSON block {parts} with the current placement.\n"
                         "Return ONLY JSON with key 'parts': array of objects {ref, lib_id, position:[x,y], rotation?}.\n"
                         "Rules: lib_id MUST be one of the allowed candidates for that ref. Do not invent symbols."
                     ),
                 },
                 {
                     "role": "user",
-                    "content": json.dumps(
-                        {
-                            "title": base.title,
-                            "parts": [
-                                {
-                                    "ref": p.ref,
-                                    "current_lib_id": p.symbol,
-                                    "value": p.value,
-                                    "position": list(p.position),
-                                    "rotation": p.rotation,
-                                    "allowed": allowed.get(p.ref, []),
-                                }
-                                for p in base.parts
-                            ],
-                        }
-                    ),
+                    "content": self._user_content(base, allowed, {"parts": self._dynamic_parts(base)}),
                 },
             ]
-            reply = self.llm.chat(prompt, temperature=0.1, max_tokens=900)
+            reply = self.llm.chat(prompt, temperature=0.1, max_tokens=900, cache_control=True)
             data = self._extract_json(reply)
             if data:
                 return self._apply_positions_and_symbols_from_json(base, data, allowed)
@@ -164,77 +187,74 @@ class ArchitectAgent:
 
         return base
 
-    def revise_design(self, design: GeneratedDesign, issues: List[str]) -> GeneratedDesign:
-        updated = design.model_copy(deep=True)
+    def revise_design(self, design: GeneratedDesign, issues: List[str], allowed: Optional[Dict[str, List[str]]] = None) -> GeneratedDesign:
         if self.use_llm and self.llm:
-            # Build a minimal pseudo CircuitSpec-like for candidates
-            dummy_parts = [
-                # Using ref/type/value from current placed parts best-effort
-                # Type is not stored on PlacedPart; infer from symbol prefix or fallback
-                # We pass an empty type so RAG uses ref heuristic
-                type("PartSpec", (), {"ref": p.ref, "type": "", "value": p.value})
-                for p in updated.parts
-            ]
-            allowed = candidates_for_parts(dummy_parts, max_per_lib=5)
+            # Parts do not change between iterations: reuse the candidates from produce_design,
+            # but only if they were computed for this design's refs
+            if allowed is None and self._allowed is not None:
+                if {p.ref for p in design.parts} <= self._allowed.keys():
+                    allowed = self._allowed
+            if allowed is None:
+                # Build a minimal pseudo CircuitSpec-like for candidates
+                dummy_parts = [
+                    # Using ref/type/value from current placed parts best-effort
+                    # Type is not stored on PlacedPart; infer from symbol prefix or fallback
+                    # We pass an empty type so RAG uses ref heuristic
+                    type("PartSpec", (), {"ref": p.ref, "type": "", "value": p.value})
+                    for p in design.parts
+                ]
+                allowed = candidates_for_parts(dummy_parts, max_per_lib=5)
+            self._allowed = allowed
             try:
                 prompt = [
                     {
                         "role": "system",
                         "content": (
                             "You are an EDA assistant. Fix reported issues by adjusting positions and selecting ONLY allowed KiCad symbols.\n"
+                            "Input: a JSON block {title, allowed_by_ref, value_by_ref}, a line '---', then a JSON block {parts, nets, issues} with the current design.\n"
                             "Return ONLY JSON: {parts:[{ref, lib_id, position:[x,y], rotation?}], nets?:string[]}."
                         ),
                     },
                     {
                         "role": "user",
-                        "content": json.dumps(
-                            {
-                                "issues": issues,
-                                "current": {
-                                    "title": updated.title,
-                                    "parts": [
-                                        {
-                                            "ref": p.ref,
-                                            "current_lib_id": p.symbol,
-                                            "value": p.value,
-                                            "position": list(p.position),
-                                            "rotation": p.rotation,
-                                            "allowed": allowed.get(p.ref, []),
-                                        }
-                                        for p in updated.parts
-                                    ],
-                                    "nets": updated.nets,
-                                },
-                            }
+                        "content": self._user_content(
+                            design,
+                            allowed,
+                            {"parts": self._dynamic_parts(design), "nets": design.nets, "issues": issues},
                         ),
                     },
                 ]
-                reply = self.llm.chat(prompt, temperature=0.1, max_tokens=900)
+                reply = self.llm.chat(prompt, temperature=0.1, max_tokens=900, cache_control=True)
                 data = self._extract_json(reply)
                 if data:
-                    return self._apply_positions_and_symbols_from_json(updated, data, allowed)
+                    return self._apply_positions_and_symbols_from_json(design, data, allowed)
             except Exception:
                 pass
 
         # Heuristic fallback if no LLM or bad reply
+        parts = list(design.parts)
+        nets = list(design.nets)
         shift_x = 10
         shift_y = 8
         any_overlap = any("overlap" in i.lower() for i in issues)
         if any_overlap:
-            for idx, part in enumerate(updated.parts):
+            for idx, part in enumerate(parts):
                 x, y = part.position
                 nx, ny = x + (idx % 3) * shift_x, y + (idx % 3) * shift_y
-                part.position = (nx, ny)
                 bx, by, bw, bh = part.bbox
-                part.bbox = (nx - bw // 2, ny - bh // 2, bw, bh)
+                parts[idx] = replace(part, position=(nx, ny), bbox=(nx - bw // 2, ny - bh // 2, bw, bh))
 
+        nets_set = set(nets)
+        new_nets: List[str] = []
         for iss in issues:
             if "unknown net" in iss.lower():
                 start = iss.find("'")
                 end = iss.rfind("'")
                 if 0 <= start < end:
                     net = iss[start + 1 : end]
-                    if net and net not in updated.nets:
-                        updated.nets.append(net)
+                    if net and net not in nets_set:
+                        nets_set.add(net)
+                        new_nets.append(net)
+        nets.extend(new_nets)
 
-        return updated
+        return GeneratedDesign(title=design.title, parts=parts, nets=nets)
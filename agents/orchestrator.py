@@ -1,31 +1,89 @@
 from __future__ import annotations
+import asyncio
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional, Tuple
 from core.ingest import load_circuit_spec, read_json_text
+from core import jsonio
 from core.models import CircuitSpec
 from agents.validator_agent import ValidatorAgent
 from kicad.gpt_writer import GptSchematicWriter
 from kicad.rag import candidates_for_parts
-from kicad.erc import run_erc, parse_erc_violations, run_erc_with_json, summarize_erc_json
-import json
+from kicad.erc import erc_violation_count, run_erc, parse_erc_violations, run_erc_with_json_async, summarize_erc_json
 import shutil
-import re
 
 
 ProgressFn = Callable[[str], None]
 
 
+# path -> (st_mtime_ns, text); repeat runs skip re-reading an unchanged template
+_reference_cache: Dict[Path, Tuple[int, str]] = {}
+
+
 def _emit(progress_cb: Optional[ProgressFn], msg: str) -> None:
     if progress_cb:
         progress_cb(msg)
 
 
+def _read_cached(path: Path) -> Optional[str]:
+    path = path.absolute()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _reference_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        return None
+    _reference_cache[path] = (mtime, text)
+    return text
+
+
+def _load_reference_text(out_dir: Path) -> Optional[str]:
+    candidates = (
+        # Prefer explicit minimal template if present
+        Path("kicad_sch_min_symbol_template.kicad_sch"),
+        # Otherwise try reference in out_dir
+        out_dir / "demo_project.kicad_sch",
+        # Finally fallback to project demo if available
+        Path("output/demo_project.kicad_sch"),
+    )
+    for path in candidates:
+        text = _read_cached(path)
+        if text is not None:
+            return text
+    return None
+
+
 def run_orchestration(
     json_path: Path,
     out_dir: Path,
     max_iters: int = 3,
     progress_cb: Optional[ProgressFn] = None,
     validator_use_llm: bool = True,
+    no_cache: bool = False,
+) -> Path:
+    return asyncio.run(
+        run_orchestration_async(
+            json_path,
+            out_dir,
+            max_iters=max_iters,
+            progress_cb=progress_cb,
+            validator_use_llm=validator_use_llm,
+            no_cache=no_cache,
+        )
+    )
+
+
+async def run_orchestration_async(
+    json_path: Path,
+    out_dir: Path,
+    max_iters: int = 3,
+    progress_cb: Optional[ProgressFn] = None,
+    validator_use_llm: bool = True,
+    no_cache: bool = False,
 ) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     # Clean debug dir at the start of each run
@@ -37,49 +95,26 @@ def run_orchestration(
             pass
 
     circuit: CircuitSpec = load_circuit_spec(json_path)
-    raw_text = read_json_text(json_path)
+    # Parsed once; the writer re-sends the same object every iteration
+    spec = jsonio.loads(read_json_text(json_path))
 
     allowed = candidates_for_parts(circuit.parts, max_per_lib=10)
     expected_refs = list(allowed.keys())
 
-    gpt_generator = GptSchematicWriter()
+    gpt_generator = GptSchematicWriter(no_cache=no_cache)
     validator = ValidatorAgent(use_llm=validator_use_llm)
 
-    # Prefer explicit minimal template if present
-    reference_text = None
-    template_root = Path("kicad_sch_min_symbol_template.kicad_sch")
-    if template_root.exists():
-        try:
-            reference_text = template_root.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            reference_text = None
-
-    # Otherwise try reference in out_dir
-    if reference_text is None:
-        reference_path = out_dir / "demo_project.kicad_sch"
-        if reference_path.exists():
-            try:
-                reference_text = reference_path.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                reference_text = None
-
-    # Finally fallback to project demo if available
-    if reference_text is None:
-        demo_root = Path("output/demo_project.kicad_sch")
-        if demo_root.exists():
-            try:
-                reference_text = demo_root.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                reference_text = None
+    reference_text = _load_reference_text(out_dir)
 
     sch_path = out_dir / f"{(circuit.title or 'design').replace(' ', '_')}.kicad_sch"
     prev_text: Optional[str] = None
     issues: list[str] = []
+    prev_issues_hash: Optional[int] = None
 
     for iteration in range(1, max_iters + 1):
         _emit(progress_cb, f"GPT Generator: writing schematic (iteration {iteration}) from LLD JSON + RAG...")
-        gpt_generator.write(
-            spec_json_text=raw_text,
+        prev_text = await gpt_generator.awrite(
+            spec=spec,
             allowed_by_ref=allowed,
             out_path=sch_path,
             prev_text=prev_text,
@@ -87,13 +122,20 @@ def run_orchestration(
             reference_text=reference_text,
         )
 
-        try:
-            prev_text = sch_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            prev_text = None
-
         _emit(progress_cb, "GPT Validator: checking KiCad 9 compliance and layout...")
-        issues = validator.validate(sch_path)
+        # ERC runs in its own process, so start it now and collect it once validation is done
+        _emit(progress_cb, "Running ERC (JSON, if available)...")
+        erc_task = asyncio.create_task(run_erc_with_json_async(sch_path))
+        result = await asyncio.to_thread(
+            validator.check, sch_path, text=prev_text, include_llm=False, final_pass=iteration == max_iters
+        )
+        issues = result.issues
+        llm_skipped = False
+        if validator.wants_llm(issues, final_pass=iteration == max_iters):
+            issues.extend(await validator.avalidate_llm(result))
+        elif validator_use_llm:
+            llm_skipped = True
+            _emit(progress_cb, f"Skipping LLM validation: {len(issues)} issues already found by regex checks.")
         if issues:
             for iss in issues:
                 _emit(progress_cb, f"Issue: {iss}")
@@ -103,17 +145,14 @@ def run_orchestration(
         # Ensure all expected refs are instantiated
         missing_refs: list[str] = []
         if prev_text:
-            found_refs = set(re.findall(r"\(property\s+\"Reference\"\s+\"([A-Za-z]+\d+)\"", prev_text))
-            for r in expected_refs:
-                if r not in found_refs:
-                    missing_refs.append(r)
+            # Refs come from the validator's own scan of the same text
+            missing_refs = [r for r in expected_refs if r not in result.found_refs]
         if missing_refs:
             msg = "Missing placed instances for refs: " + ", ".join(missing_refs)
             _emit(progress_cb, msg)
             issues.append(msg)
 
-        _emit(progress_cb, "Running ERC (JSON, if available)...")
-        erc_proc, erc_json, json_path_tmp = run_erc_with_json(sch_path)
+        erc_proc, erc_json, json_path_tmp = await erc_task
         erc_rc = None
         erc_violations = None
         erc_summary_lines = []
@@ -123,7 +162,7 @@ def run_orchestration(
             for line in erc_summary_lines:
                 _emit(progress_cb, line)
         else:
-            erc = run_erc(sch_path)
+            erc = await asyncio.to_thread(run_erc, sch_path)
             if erc is not None:
                 erc_rc = erc.returncode
                 erc_violations = parse_erc_violations((erc.stdout or "") + "\n" + (erc.stderr or ""))
@@ -135,7 +174,7 @@ def run_orchestration(
 
         if erc_json is not None and erc_violations is None:
             try:
-                erc_violations = len(erc_json.get("violations") or [])
+                erc_violations = erc_violation_count(erc_json)
             except Exception:
                 pass
 
@@ -143,6 +182,21 @@ def run_orchestration(
             _emit(progress_cb, "Schematic accepted (no GPT issues, ERC exit 0, violations 0).")
             break
 
+        # Same findings as the previous iteration: another generator call + ERC run won't help
+        issues_hash = hash((tuple(sorted(issues)), erc_rc, erc_violations))
+        if issues_hash == prev_issues_hash:
+            _emit(progress_cb, "No progress since the previous iteration; stopping.")
+            if llm_skipped:
+                # This is the last pass after all, so still collect the LLM's final nits
+                _emit(progress_cb, "GPT Validator: final LLM pass...")
+                final = await asyncio.to_thread(
+                    validator.check, sch_path, text=prev_text, include_llm=False, final_pass=True
+                )
+                for iss in await validator.avalidate_llm(final):
+                    _emit(progress_cb, f"Issue: {iss}")
+            break
+        prev_issues_hash = issues_hash
+
         feedback = {"validator_feedback": issues}
         if erc_rc is not None:
             feedback["erc_returncode"] = erc_rc
@@ -150,7 +204,7 @@ def run_orchestration(
             feedback["erc_violations"] = erc_violations
         if erc_summary_lines:
             feedback["erc_summary"] = erc_summary_lines
-        gpt_generator._add_history("user", json.dumps(feedback))
+        gpt_generator._add_history("user", jsonio.dumps(feedback))
 
     return sch_path
 
@@ -1,119 +1,334 @@
 from __future__ import annotations
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
 from pathlib import Path
+from core import jsonio
 from tools.openai_client import LLMClient
+import mmap
+import numpy as np
 import re
 
+try:
+    from scipy.spatial import cKDTree
+except Exception:
+    cKDTree = None  # type: ignore
+
+
+# Strings are matched as whole tokens so parentheses inside them are not counted.
+_RE_SYMBOL_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|\((property|lib_id|at|uuid)\b|\(|\)')
+# Placed instances open with a child block, e.g. (symbol (lib_id ...; library
+# definitions always carry a quoted name, (symbol "R" ..., so they never match.
+_RE_INSTANCE_START = re.compile(rb"\(symbol\s*\(")
+_RE_SHEET_INSTANCES_START = re.compile(rb"\(sheet_instances\b")
+_RE_LIB_SYMBOLS_START = re.compile(rb"\(lib_symbols\b")
+_RE_LIB_ID = re.compile(rb"\(lib_id\s+\"([^\"]+)\"\)")
+_RE_AT = re.compile(rb"\(at\s+(-?[\d\.]+)\s+(-?[\d\.]+)(?:\s+(-?[\d\.]+))?\)")
+_RE_REFERENCE = re.compile(rb"\(property\s+\"Reference\"\s+\"([A-Za-z]+\d+)\"")
+_RE_EXCERPT_PROPERTY = re.compile(rb'\(property\s+"(?:Reference|Value)"\s+"(?:[^"\\]|\\.)*"')
+# Every whole-file check is answered from one finditer pass over this alternation. The
+# shared "(" stays outside the groups so the engine can skip to the next paren instead
+# of trying every branch at every byte.
+_RE_ALL = re.compile(
+    rb"\((?:"
+    rb"(?P<libsyms>lib_symbols)"
+    rb"|(?P<libid>lib_id\s+\"(?P<libid_v>[^\"]+)\"\))"
+    rb"|(?P<ref>property\s+\"Reference\"\s+\"(?P<ref_v>[A-Za-z]+\d+)\")"
+    rb"|(?P<pin>pin\b)"
+    rb"|(?P<shape>(?:rectangle|polyline|circle|arc)\b)"
+    rb"|(?P<sheetinst>sheet_instances)"
+    rb"|(?P<kicadsch>kicad_sch)"
+    rb"|(?P<ver>version\s+(?P<ver_v>\d+)\))"
+    rb")"
+)
+
+# Schematics are scanned as raw bytes (mostly ASCII); only captured values are decoded.
+_ENCODING = "utf-8"
+
+# With this many cheap findings the generator already has enough to fix; skip the LLM call.
+LLM_SKIP_THRESHOLD = 3
+
+# Size of the structured schematic excerpt sent to the LLM validator, and of the
+# plain prefix sent instead when llm_full_text is set.
+_LLM_EXCERPT_CHARS = 4000
+_LLM_HEADER_BYTES = 1000
+_LLM_FULL_CHARS = 10000
+
+# Above this many instances (when scipy is importable) close pairs come from a KD-tree query.
+_KDTREE_MIN_INSTANCES = 1000
+# Otherwise pairwise distances are computed this many rows at a time to bound memory.
+_PAIR_BLOCK_ROWS = 256
+
+
+@dataclass
+class ValidationCtx:
+    data: bytes
+    used_lib_ids: List[str] = field(default_factory=list)
+    found_refs: Set[str] = field(default_factory=set)
+    has_lib_symbols: bool = False
+    has_sheet_instances: bool = False
+    has_kicad_sch: bool = False
+    versions: Set[str] = field(default_factory=set)
+    pin_count: int = 0
+    shape_count: int = 0
+    # Filled lazily by ValidatorAgent._scan_blocks
+    instances: Optional[List[Tuple[str, float, float, float, str, bool]]] = None
+    instance_starts: List[int] = field(default_factory=list)
+    sheet_instances_span: Optional[Tuple[int, int]] = None
+    lib_symbols_start: Optional[int] = None
+
+
+# What validate() reports plus the scan facts callers would otherwise rescan the file for
+@dataclass
+class ValidationResult:
+    issues: List[str] = field(default_factory=list)
+    found_refs: Set[str] = field(default_factory=set)
+    has_lib_symbols: bool = False
+    version_ok: bool = False
+    # Prompt for a deferred avalidate_llm() call, built from the same scan
+    llm_messages: Optional[List[Dict[str, str]]] = None
+
 
 class ValidatorAgent:
-    def __init__(self, use_llm: bool = False):
+    def __init__(self, use_llm: bool = False, llm_full_text: bool = False):
         self.use_llm = use_llm
+        self.llm_full_text = llm_full_text
         self.llm = LLMClient() if use_llm else None
 
-    def _check_kicad_text_llm(self, sch_path: Path) -> List[str]:
-        if not self.llm:
-            return []
-        try:
-            text = sch_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            return [f"Cannot read schematic file: {sch_path}"]
+    def _load_bytes(self, sch_path: Path) -> bytes | mmap.mmap:
+        with open(sch_path, "rb") as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # mmap refuses empty files
+                return b""
+
+    def _build_ctx(self, data: bytes | mmap.mmap) -> ValidationCtx:
+        ctx = ValidationCtx(data=data)
+        for m in _RE_ALL.finditer(data):
+            kind = m.lastgroup
+            if kind == "libid":
+                ctx.used_lib_ids.append(m.group("libid_v").decode(_ENCODING, "ignore"))
+            elif kind == "ref":
+                ctx.found_refs.add(m.group("ref_v").decode(_ENCODING, "ignore"))
+            elif kind == "pin":
+                ctx.pin_count += 1
+            elif kind == "shape":
+                ctx.shape_count += 1
+            elif kind == "libsyms":
+                ctx.has_lib_symbols = True
+            elif kind == "sheetinst":
+                ctx.has_sheet_instances = True
+            elif kind == "kicadsch":
+                ctx.has_kicad_sch = True
+            elif kind == "ver":
+                ctx.versions.add(m.group("ver_v").decode(_ENCODING, "ignore"))
+        return ctx
+
+    def _llm_messages(self, ctx: ValidationCtx) -> List[Dict[str, str]]:
         system = (
             "You are a KiCad 9 schematic format validator. Check the text for KiCad 9 S-expression compliance and layout sanity.\n"
             "Verify: top-level (kicad_sch ...), (paper ...), (title_block ...), symbol blocks with (lib_id ...), (at ...), (uuid ...), (property ...).\n"
             "Also verify engineering layout basics: placed symbol instances not overlapping based on their (at x y) position and typical symbol sizes; reasonable spacing; consistent orientation.\n"
             "Return ONLY JSON: {issues: string[]} with specific, actionable messages."
         )
-        user = text[:10000]
-        reply = self.llm.chat([
+        if self.llm_full_text:
+            user = ctx.data[:_LLM_FULL_CHARS].decode(_ENCODING, "ignore")
+        else:
+            system += (
+                "\nThe input is an excerpt: the file header, (sheet_instances ...) and the placed (symbol ...) instances,"
+                " each reduced to its lib_id, at, uuid, Reference and Value."
+                " The (lib_symbols ...) section, pins and other properties are omitted on purpose; do not report them as missing."
+            )
+            user = self._llm_excerpt(ctx)
+        return [
             {"role": "system", "content": system},
             {"role": "user", "content": user},
-        ], max_completion_tokens=1500)
+        ]
+
+    def _parse_llm_issues(self, reply: str) -> List[str]:
         if not reply:
             return []
-        import json as _json
-        s = reply.find("{")
-        e = reply.rfind("}")
-        if s != -1 and e != -1 and e > s:
-            try:
-                data = _json.loads(reply[s:e+1])
-                if isinstance(data, dict) and isinstance(data.get("issues"), list):
-                    return [str(x) for x in data["issues"]]
-            except Exception:
-                return ["LLM returned non-JSON response for KiCad validation."]
+        data = jsonio.extract_json_object(reply)
+        if data is None:
+            return ["LLM returned non-JSON response for KiCad validation."] if "{" in reply else []
+        if isinstance(data, dict) and isinstance(data.get("issues"), list):
+            return [str(x) for x in data["issues"]]
         return []
 
-    def _check_missing_embedded_symbols(self, sch_path: Path) -> List[str]:
-        try:
-            text = sch_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
+    def _check_kicad_text_llm(self, ctx: ValidationCtx) -> List[str]:
+        if not self.llm:
             return []
+        reply = self.llm.chat(self._llm_messages(ctx), max_completion_tokens=1500, cache_control=True)
+        return self._parse_llm_issues(reply)
+
+    def _check_missing_embedded_symbols(self, ctx: ValidationCtx) -> List[str]:
         issues: List[str] = []
-        has_lib_symbols = "(lib_symbols" in text
-        used_lib_ids = re.findall(r"\(lib_id\s+\"([^\"]+)\"\)", text)
-        if used_lib_ids and not has_lib_symbols:
-            uniq = sorted(set(used_lib_ids))
+        if ctx.used_lib_ids and not ctx.has_lib_symbols:
+            uniq = sorted(set(ctx.used_lib_ids))
             issues.append(
                 "No (lib_symbols ...) block present. Embed symbol definitions for: " + ", ".join(uniq[:20])
             )
         return issues
 
-    def _check_symbol_pins_and_graphics(self, sch_path: Path) -> List[str]:
-        try:
-            text = sch_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            return []
+    def _check_symbol_pins_and_graphics(self, ctx: ValidationCtx) -> List[str]:
         issues: List[str] = []
-        if "(lib_symbols" not in text:
+        if not ctx.has_lib_symbols:
             return issues
-        pin_count = len(re.findall(r"\(pin\b", text))
-        shape_count = len(re.findall(r"\((rectangle|polyline|circle|arc)\b", text))
-        if pin_count == 0:
+        if ctx.pin_count == 0:
             issues.append("Embedded symbols lack (pin ...) definitions. Add pins with name/number, (at x y), and length.")
-        if shape_count == 0:
+        if ctx.shape_count == 0:
             issues.append("Embedded symbols lack basic graphics (rectangle/polyline). Add a body rectangle around the symbol.")
         return issues
 
-    def _check_invalid_lib_ids_and_sheet(self, sch_path: Path) -> List[str]:
-        try:
-            text = sch_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            return []
+    def _check_invalid_lib_ids_and_sheet(self, ctx: ValidationCtx) -> List[str]:
         issues: List[str] = []
-        invalids = [m for m in re.findall(r"\(lib_id\s+\"([^\"]+)\"\)", text) if m.strip().lower() in {"device:u", "device:unknown"}]
+        invalids = [m for m in ctx.used_lib_ids if m.strip().lower() in {"device:u", "device:unknown"}]
         if invalids:
             uniq = sorted(set(invalids))
             issues.append("Invalid lib_id(s) found: " + ", ".join(uniq) + ". Replace with valid symbols or embed their definitions.")
-        if "(sheet_instances" not in text:
+        if not ctx.has_sheet_instances:
             issues.append("Missing (sheet_instances ...) block. Add minimal KiCad 9 sheet bookkeeping to improve compatibility.")
-        if "(kicad_sch" in text and "(version 20250114)" not in text:
+        if ctx.has_kicad_sch and "20250114" not in ctx.versions:
             issues.append("Header version is not KiCad 9 (20250114). Use (version 20250114) (generator eeschema).")
         return issues
 
-    def _extract_instances(self, sch_path: Path) -> List[Tuple[str, float, float, float, str, bool]]:
-        try:
-            text = sch_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            return []
+    def _scan_block(self, data: bytes | mmap.mmap, start: int, to_end: bool = True) -> Tuple[Optional[int], dict]:
+        # Tokenize one S-expression block starting at `start` and capture the
+        # (lib_id/at/uuid/Reference) values of its direct children. Returns the block's
+        # end offset, or None if it is never closed. With to_end=False the scan stops as
+        # soon as all four are captured and returns where it stopped instead.
+        found: dict = {}
+        depth = 0
+        for m in _RE_SYMBOL_TOKEN.finditer(data, start):
+            tok = m.group(0)
+            if tok == b")":
+                depth -= 1
+                if depth == 0:
+                    return m.end(), found
+                continue
+            if tok[:1] == b'"':
+                continue
+            depth += 1
+            if depth != 2:
+                continue
+            kw = m.group(1)
+            pos = m.start()
+            if kw == b"lib_id":
+                lib_m = _RE_LIB_ID.match(data, pos)
+                if lib_m:
+                    found["lib_id"] = lib_m.group(1).decode(_ENCODING, "ignore")
+            elif kw == b"at" and "at" not in found:
+                at_m = _RE_AT.match(data, pos)
+                if at_m:
+                    try:
+                        found["at"] = (
+                            float(at_m.group(1)),
+                            float(at_m.group(2)),
+                            float(at_m.group(3)) if at_m.group(3) else 0.0,
+                        )
+                    except Exception:
+                        found["at"] = (0.0, 0.0, 0.0)
+            elif kw == b"uuid":
+                found["uuid"] = True
+            elif kw == b"property":
+                ref_m = _RE_REFERENCE.match(data, pos)
+                if ref_m:
+                    found["ref"] = ref_m.group(1).decode(_ENCODING, "ignore")
+            if not to_end and len(found) == 4:
+                return m.end(), found
+        return None, found
+
+    def _scan_blocks(self, ctx: ValidationCtx) -> None:
+        # Regexes jump straight to the placed (symbol ...) instances and (sheet_instances ...);
+        # only those blocks are tokenized, never the (lib_symbols ...) graphics that make up
+        # most of the file. An instance is only read up to its last needed child (the pin and
+        # instances bookkeeping after it is skipped); _llm_excerpt finds full spans on demand.
+        if ctx.instances is not None:
+            return
+        data = ctx.data
         instances: List[Tuple[str, float, float, float, str, bool]] = []
-        for m in re.finditer(r"\(property\s+\"Reference\"\s+\"([A-Za-z]+\d+)\"", text):
-            ref = m.group(1)
-            start = max(0, m.start() - 2000)
-            end = min(len(text), m.end() + 2000)
-            window = text[start:end]
-            at_m = re.search(r"\(at\s+(-?[\d\.]+)\s+(-?[\d\.]+)(?:\s+(-?[\d\.]+))?\)", window)
-            lib_m = re.search(r"\(lib_id\s+\"([^\"]+)\"\)", window)
-            uuid_m = re.search(r"\(uuid\s+[0-9a-fA-F-]{8,}\)", window)
-            if at_m and lib_m:
-                try:
-                    x = float(at_m.group(1))
-                    y = float(at_m.group(2))
-                    rot = float(at_m.group(3)) if at_m.group(3) else 0.0
-                except Exception:
-                    x, y, rot = 0.0, 0.0, 0.0
-                lib_id = lib_m.group(1)
-                has_uuid = bool(uuid_m)
-                instances.append((ref, x, y, rot, lib_id, has_uuid))
-        return instances
+        starts: List[int] = []
+        lib_m = _RE_LIB_SYMBOLS_START.search(data)
+        ctx.lib_symbols_start = lib_m.start() if lib_m else None
+        sheet_m = _RE_SHEET_INSTANCES_START.search(data)
+        if sheet_m:
+            end, _ = self._scan_block(data, sheet_m.start())
+            if end is not None:
+                ctx.sheet_instances_span = (sheet_m.start(), end)
+        m = _RE_INSTANCE_START.search(data)
+        while m:
+            start = m.start()
+            end, found = self._scan_block(data, start, to_end=False)
+            if end is None:
+                break
+            if "lib_id" in found and "ref" in found and "at" in found:
+                x, y, rot = found["at"]
+                instances.append((found["ref"], x, y, rot, found["lib_id"], found.get("uuid", False)))
+                starts.append(start)
+            m = _RE_INSTANCE_START.search(data, end)
+        ctx.instances = instances
+        ctx.instance_starts = starts
+
+    def _extract_instances(self, ctx: ValidationCtx) -> List[Tuple[str, float, float, float, str, bool]]:
+        self._scan_blocks(ctx)
+        return ctx.instances or []
+
+    def _trimmed_instance(self, data: bytes | mmap.mmap, start: int) -> Optional[bytes]:
+        # One-line (symbol ...) with just the children the layout review needs; a full
+        # KiCad 9 instance (pins, (instances ...), every property) is ~1.3 KB.
+        keep: List[bytes] = []
+        depth = 0
+        child_start = -1
+        child_kw = None
+        has_at = False
+        for m in _RE_SYMBOL_TOKEN.finditer(data, start):
+            tok = m.group(0)
+            if tok == b")":
+                depth -= 1
+                if depth == 0:
+                    return b"\t(symbol " + b" ".join(keep) + b")"
+                if depth == 1 and child_kw in (b"lib_id", b"at", b"uuid"):
+                    keep.append(data[child_start : m.end()])
+                continue
+            if tok[:1] == b'"':
+                continue
+            depth += 1
+            if depth != 2:
+                continue
+            child_start = m.start()
+            child_kw = m.group(1)
+            if child_kw == b"at":
+                # Only the instance's own position, not a later (at ...) sibling
+                if has_at:
+                    child_kw = None
+                has_at = True
+            elif child_kw == b"property":
+                prop_m = _RE_EXCERPT_PROPERTY.match(data, child_start)
+                if prop_m:
+                    keep.append(prop_m.group(0) + b")")
+        return None
+
+    def _llm_excerpt(self, ctx: ValidationCtx) -> str:
+        # Header, sheet bookkeeping and trimmed placed instances only: the (lib_symbols ...)
+        # graphics that dominate the file say nothing about layout.
+        self._scan_blocks(ctx)
+        data = ctx.data
+        header_end = ctx.lib_symbols_start
+        if header_end is None:
+            header_end = ctx.instance_starts[0] if ctx.instance_starts else len(data)
+        chunks = [data[: min(header_end, _LLM_HEADER_BYTES)].rstrip()]
+        if ctx.sheet_instances_span:
+            s, e = ctx.sheet_instances_span
+            chunks.append(data[s:e])
+        size = sum(len(c) for c in chunks)
+        for s in ctx.instance_starts:
+            block = self._trimmed_instance(data, s)
+            # Stop on a whole block so the excerpt never ends mid S-expression
+            if block is None or size + len(block) + 1 > _LLM_EXCERPT_CHARS:
+                break
+            chunks.append(block)
+            size += len(block) + 1
+        return b"\n".join(chunks).decode(_ENCODING, "ignore")
 
     def _desired_prefix_for_lib(self, lib_id: str) -> str:
         l = lib_id.lower()
@@ -135,18 +350,35 @@ class ValidatorAgent:
             return "Y"
         return "U"
 
-    def _check_instance_positions_and_refs(self, sch_path: Path) -> List[str]:
-        inst = self._extract_instances(sch_path)
+    def _close_pairs(self, inst: List[Tuple[str, float, float, float, str, bool]], min_spacing: float) -> List[Tuple[int, int]]:
+        if len(inst) < 2:
+            return []
+        xy = np.asarray([(x, y) for _, x, y, _, _, _ in inst], dtype=np.float64)
+        thr = min_spacing * min_spacing
+        if cKDTree is not None and len(inst) > _KDTREE_MIN_INSTANCES:
+            pairs = cKDTree(xy).query_pairs(min_spacing, output_type="ndarray")
+            if not len(pairs):
+                return []
+            # query_pairs is inclusive and unordered; keep strict "<" and loop order
+            diff = xy[pairs[:, 0]] - xy[pairs[:, 1]]
+            pairs = pairs[(diff * diff).sum(-1) < thr]
+            pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+            return [(int(i), int(j)) for i, j in pairs]
+        out: List[Tuple[int, int]] = []
+        for b in range(0, len(xy), _PAIR_BLOCK_ROWS):
+            # Rows b..b+B against columns b.. only; k=1 keeps j > i within the block
+            diff = xy[b : b + _PAIR_BLOCK_ROWS, None, :] - xy[None, b:, :]
+            d2 = (diff * diff).sum(-1)
+            i_idx, j_idx = np.where(np.triu(d2 < thr, k=1))
+            out.extend(zip((i_idx + b).tolist(), (j_idx + b).tolist()))
+        return out
+
+    def _check_instance_positions_and_refs(self, ctx: ValidationCtx) -> List[str]:
+        inst = self._extract_instances(ctx)
         issues: List[str] = []
         min_spacing = 20.0
-        for i in range(len(inst)):
-            ref_i, xi, yi, _, _, _ = inst[i]
-            for j in range(i + 1, len(inst)):
-                ref_j, xj, yj, _, _, _ = inst[j]
-                dx = xi - xj
-                dy = yi - yj
-                if (dx * dx + dy * dy) < (min_spacing * min_spacing):
-                    issues.append(f"Placed instances too close: {ref_i} and {ref_j} (increase spacing >= {min_spacing}).")
+        for i, j in self._close_pairs(inst, min_spacing):
+            issues.append(f"Placed instances too close: {inst[i][0]} and {inst[j][0]} (increase spacing >= {min_spacing}).")
         for ref, _, _, _, lib_id, has_uuid in inst:
             want_prefix = self._desired_prefix_for_lib(lib_id)
             if not ref.upper().startswith(want_prefix):
@@ -155,13 +387,70 @@ class ValidatorAgent:
                 issues.append(f"Placed instance {ref} is missing (uuid ...). Add a UUID to each (symbol ...) instance.")
         return issues
 
-    def validate(self, sch_path: Path) -> List[str]:
-        issues: List[str] = []
-        issues.extend(self._check_missing_embedded_symbols(sch_path))
-        issues.extend(self._check_symbol_pins_and_graphics(sch_path))
-        issues.extend(self._check_invalid_lib_ids_and_sheet(sch_path))
-        issues.extend(self._check_instance_positions_and_refs(sch_path))
-        if self.use_llm:
-            issues.extend(self._check_kicad_text_llm(sch_path))
-        return issues
+    def _open_data(self, sch_path: Path, text: Optional[str]) -> bytes | mmap.mmap:
+        # Callers that just wrote the file pass its text to skip the disk read
+        if text is not None:
+            return text.encode(_ENCODING)
+        return self._load_bytes(sch_path)
+
+    def _release(self, data: bytes | mmap.mmap) -> None:
+        # Release the mapping so the generator can rewrite the file next iteration
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    def wants_llm(self, cheap_issues: List[str], final_pass: bool = True) -> bool:
+        # The last pass always asks the LLM so final nits are still collected
+        return self.use_llm and (final_pass or len(cheap_issues) < LLM_SKIP_THRESHOLD)
+
+    async def avalidate_llm(self, result: ValidationResult) -> List[str]:
+        # Runs the LLM pass that check(include_llm=False) prepared, without rescanning the file
+        if not self.llm or result.llm_messages is None:
+            return []
+        reply = await self.llm.achat(result.llm_messages, max_completion_tokens=1500, cache_control=True)
+        return self._parse_llm_issues(reply)
+
+    def check(
+        self,
+        sch_path: Path,
+        text: Optional[str] = None,
+        include_llm: bool = True,
+        final_pass: bool = True,
+    ) -> ValidationResult:
+        try:
+            data = self._open_data(sch_path, text)
+        except Exception:
+            issues = [f"Cannot read schematic file: {sch_path}"] if include_llm and self.use_llm and self.llm else []
+            return ValidationResult(issues=issues)
+        try:
+            ctx = self._build_ctx(data)
+            issues: List[str] = []
+            issues.extend(self._check_missing_embedded_symbols(ctx))
+            issues.extend(self._check_symbol_pins_and_graphics(ctx))
+            issues.extend(self._check_invalid_lib_ids_and_sheet(ctx))
+            issues.extend(self._check_instance_positions_and_refs(ctx))
+            llm_messages = None
+            if self.llm and self.wants_llm(issues, final_pass):
+                if include_llm:
+                    issues.extend(self._check_kicad_text_llm(ctx))
+                else:
+                    # Built while the mapping is still open; the caller awaits the reply later
+                    llm_messages = self._llm_messages(ctx)
+            return ValidationResult(
+                issues=issues,
+                found_refs=ctx.found_refs,
+                has_lib_symbols=ctx.has_lib_symbols,
+                version_ok="20250114" in ctx.versions,
+                llm_messages=llm_messages,
+            )
+        finally:
+            self._release(data)
+
+    def validate(
+        self,
+        sch_path: Path,
+        text: Optional[str] = None,
+        include_llm: bool = True,
+        final_pass: bool = True,
+    ) -> List[str]:
+        return self.check(sch_path, text=text, include_llm=include_llm, final_pass=final_pass).issues
 
@@ -1,37 +1,39 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-import json
+from typing import Dict, Any, List, Optional, Tuple
+from core import jsonio
 from core.models import CircuitSpec, PartSpec, NetSpec
 
 
+# category -> (part type, symbol guess); passives are split on the id's first letter
+_CATEGORY_MAP: Dict[str, Tuple[str, Optional[str]]] = {
+    "microcontroller": ("MCU", "Device:U"),
+    "processor": ("MCU", "Device:U"),
+    "mcu": ("MCU", "Device:U"),
+    "sensor": ("U", "Device:U"),
+    "power-protection": ("U", "Device:U"),
+    "power-supply": ("U", "Device:U"),
+    "connector": ("Conn", "Connector_Generic:Conn_01x02"),
+}
+_CATEGORY_DEFAULT: Tuple[str, Optional[str]] = ("U", None)
+
+_PASSIVE_MAP: Dict[str, Tuple[str, Optional[str]]] = {
+    "C": ("C", "Device:C"),
+    "R": ("R", "Device:R"),
+    "L": ("L", "Device:L"),
+}
+_PASSIVE_DEFAULT: Tuple[str, Optional[str]] = ("R", "Device:R")
+
+
 def _map_component_to_partspec(component: Dict[str, Any], index: int) -> PartSpec:
     cid = component.get("id", f"U{index+1}")
     category = (component.get("category") or "").lower()
     value = component.get("value")
 
-    type_guess = "U"
-    symbol_guess = None
-
     if category == "passive":
-        if str(cid).upper().startswith("C"):
-            type_guess = "C"
-            symbol_guess = "Device:C"
-        elif str(cid).upper().startswith("R"):
-            type_guess = "R"
-            symbol_guess = "Device:R"
-        else:
-            type_guess = "R"
-            symbol_guess = "Device:R"
-    elif category in {"microcontroller", "processor", "mcu"}:
-        type_guess = "MCU"
-        symbol_guess = "Device:U"
-    elif category in {"sensor", "power-protection", "power-supply"}:
-        type_guess = "U"
-        symbol_guess = "Device:U"
-    elif category == "connector":
-        type_guess = "Conn"
-        symbol_guess = "Connector_Generic:Conn_01x02"
+        type_guess, symbol_guess = _PASSIVE_MAP.get(str(cid)[:1].upper(), _PASSIVE_DEFAULT)
+    else:
+        type_guess, symbol_guess = _CATEGORY_MAP.get(category, _CATEGORY_DEFAULT)
 
     return PartSpec(
         ref=str(cid),
@@ -76,7 +78,7 @@ def _convert_pseudo_cad_schema(data: Dict[str, Any]) -> CircuitSpec:
 
 def load_circuit_spec(path: Path) -> CircuitSpec:
     raw_text = Path(path).read_text(encoding="utf-8")
-    raw = json.loads(raw_text)
+    raw = jsonio.loads(raw_text)
     if isinstance(raw, dict) and "components" in raw:
         return _convert_pseudo_cad_schema(raw)
     if isinstance(raw, dict) and ("parts" in raw or "nets" in raw):
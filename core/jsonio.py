@@ -0,0 +1,99 @@
+from __future__ import annotations
+from typing import Any, List, Optional
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def loads(text: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps(obj: Any) -> str:
+    # Compact output either way; orjson emits UTF-8 rather than \u escapes
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+# Characters that can change bracket depth or string state; everything else is skipped in C
+_RE_JSON_SIG = re.compile(r'[{}"\\]')
+
+
+# Incrementally locates the first balanced top-level {...} in streamed text. Prose
+# before the object is dropped, braces inside string literals are ignored, and
+# depth/string/escape state carries across feed() calls.
+class JsonObjectStream:
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._started = False
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._result: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self._result is not None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self._result is not None or not chunk:
+            return self._result
+        pos = 0
+        if not self._started:
+            pos = chunk.find("{")
+            if pos == -1:
+                return None
+            self._started = True
+        begin = pos
+        if self._escape:
+            # Previous chunk ended on a backslash inside a string
+            self._escape = False
+            pos += 1
+        n = len(chunk)
+        while pos < n:
+            m = _RE_JSON_SIG.search(chunk, pos)
+            if not m:
+                break
+            ch = m.group(0)
+            pos = m.end()
+            if self._in_str:
+                if ch == "\\":
+                    if pos >= n:
+                        self._escape = True
+                    pos += 1
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[begin:pos])
+                    self._result = "".join(self._parts)
+                    self._parts = []
+                    return self._result
+        self._parts.append(chunk[begin:])
+        return None
+
+
+def extract_json_object(text: str) -> Any:
+    start = text.find("{") if text else -1
+    while start != -1:
+        snippet = JsonObjectStream().feed(text[start:])
+        if snippet is None:
+            return None
+        try:
+            return loads(snippet)
+        except Exception:
+            # A stray brace in leading prose; retry from the next candidate
+            start = text.find("{", start + 1)
+    return None
@@ -1,8 +1,9 @@
 from __future__ import annotations
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
-import json
+from core import jsonio
 
 
 class PartSpec(BaseModel):
@@ -26,24 +27,28 @@ class CircuitSpec(BaseModel):
 
     @staticmethod
     def from_json_file(path: Path) -> "CircuitSpec":
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = jsonio.loads(Path(path).read_bytes())
         return CircuitSpec(**data)
 
 
-class PlacedPart(BaseModel):
+# Placed parts and designs are built and copied internally on every LLM round-trip,
+# so they are plain slotted dataclasses rather than validated pydantic models.
+@dataclass(slots=True, kw_only=True)
+class PlacedPart:
     ref: str
     symbol: str
     value: Optional[str] = None
     position: Tuple[int, int]
     rotation: int = 0
-    pins: Dict[str, str] = Field(default_factory=dict)
+    pins: Dict[str, str] = field(default_factory=dict)
     bbox: Tuple[int, int, int, int] = (0, 0, 0, 0)
 
 
-class GeneratedDesign(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class GeneratedDesign:
     title: str = "Untitled"
-    parts: List[PlacedPart] = Field(default_factory=list)
-    nets: List[str] = Field(default_factory=list)
+    parts: List[PlacedPart] = field(default_factory=list)
+    nets: List[str] = field(default_factory=list)
 
     def net_exists(self, name: str) -> bool:
         return name in self.nets
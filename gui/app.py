@@ -1,10 +1,10 @@
 from __future__ import annotations
+import asyncio
 import sys
 from pathlib import Path
 from PySide6.QtCore import QObject, Signal, QThread
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel, QTextEdit, QFileDialog, QCheckBox
-from core.ingest import load_circuit_spec
-from agents.orchestrator import run_orchestration
+from agents.orchestrator import run_orchestration_async
 
 
 class WorkerSignals(QObject):
@@ -28,8 +28,17 @@ class PipelineWorker(QThread):
     def run(self):
         try:
             self._log("Reading input JSON...")
-            circuit = load_circuit_spec(self.input_path)
-            sch = run_orchestration(circuit, self.out_dir, max_iters=self.iters, progress_cb=self._log, use_llm=self.use_llm)
+            # The pipeline awaits OpenAI and kicad-cli on this thread's own event loop;
+            # progress reaches the UI through the queued Qt signal.
+            sch = asyncio.run(
+                run_orchestration_async(
+                    self.input_path,
+                    self.out_dir,
+                    max_iters=self.iters,
+                    progress_cb=self._log,
+                    validator_use_llm=self.use_llm,
+                )
+            )
             self._log(f"Schematic written: {sch}")
             self.signals.done.emit(sch)
         except Exception as e:
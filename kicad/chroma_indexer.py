@@ -1,51 +1,91 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
-from kicad.library import _candidate_symbol_dirs, _list_symbol_files
-from tools.chroma_client import ChromaClient
+from typing import List, Dict, Optional, Tuple
+from kicad.library import _IO_WORKERS, _candidate_symbol_dirs, _list_symbol_files
+from tools.chroma_client import get_client
 import hashlib
+import mmap
+import re
 
 
-def _make_id(lib: str, path: Path) -> str:
-    h = hashlib.sha1(str(path).encode("utf-8")).hexdigest()
-    return f"{lib}|{h}"
+_ENTRY_RE = re.compile(
+    rb'\(symbol\s+"([^"]+)"|\(property\s+"(ki_description|Description|ki_keywords)"\s+"((?:[^"\\]|\\.)*)"'
+)
+_UNIT_SUFFIX_RE = re.compile(r"_\d+_\d+$")
 
 
-def build_symbol_documents() -> List[Dict[str, str]]:
-    docs: List[Dict[str, str]] = []
+def _make_id(path: Path) -> str:
+    # Only used for dedup and as the Chroma key, so a short 64-bit digest is enough
+    return hashlib.blake2b(str(path).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _compact_one(fpath: Path) -> Optional[str]:
+    # One "name: description keywords" line per top-level symbol; pin and graphics
+    # geometry carry nothing useful for retrieval.
+    try:
+        with open(fpath, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            matches = _ENTRY_RE.findall(mm)
+    except ValueError:
+        return ""  # empty file
+    except OSError:
+        return None
+    entries: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for sym, _, text in matches:
+        if sym:
+            name = sym.decode("utf-8", "ignore")
+            # Unit sub-symbols ("R_0_1") belong to the symbol they are nested in
+            if current is not None and name.startswith(current + "_") and _UNIT_SUFFIX_RE.search(name):
+                continue
+            current = name
+            entries.setdefault(name, [])
+        elif current is not None and text:
+            entries[current].append(text.decode("utf-8", "ignore"))
+    return "\n".join(f"{name}: {' '.join(parts)}" for name, parts in entries.items())
+
+
+def build_symbol_documents() -> Tuple[List[str], List[str], List[Dict[str, str]]]:
+    # Parallel ids/documents/metadatas lists, the shape Chroma's add() takes
+    files: List[Path] = []
+    file_ids: List[str] = []
     seen_ids: set[str] = set()
     for root in _candidate_symbol_dirs():
         for fpath in _list_symbol_files(root):
-            lib = fpath.stem
-            doc_id = _make_id(lib, fpath)
+            doc_id = _make_id(fpath)
             if doc_id in seen_ids:
                 continue
             seen_ids.add(doc_id)
-            try:
-                text = fpath.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
+            files.append(fpath)
+            file_ids.append(doc_id)
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, str]] = []
+    # Copies of the same library under different roots would embed to the same vector
+    seen_docs: set[bytes] = set()
+    with ThreadPoolExecutor(max_workers=_IO_WORKERS) as ex:
+        for doc_id, fpath, text in zip(file_ids, files, ex.map(_compact_one, files)):
+            if not text:
+                continue
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+            if digest in seen_docs:
                 continue
-            docs.append({
-                "id": doc_id,
-                "document": text,
-                "lib": lib,
-                "path": str(fpath),
-            })
-    return docs
+            seen_docs.add(digest)
+            ids.append(doc_id)
+            documents.append(text)
+            metadatas.append({"lib": fpath.stem, "path": str(fpath)})
+    return ids, documents, metadatas
 
 
 def populate_chroma(persist_dir: str = ".chroma", collection: str = "kicad_symbols") -> None:
-    client = ChromaClient(persist_dir=persist_dir)
+    client = get_client(persist_dir)
     try:
         client.delete_collection(collection)
     except Exception:
         pass
-    docs = build_symbol_documents()
-    if not docs:
+    ids, documents, metadatas = build_symbol_documents()
+    if not ids:
         return
-    ids = [d["id"] for d in docs]
-    documents = [d["document"] for d in docs]
-    metadatas = [{"lib": d["lib"], "path": d["path"]} for d in docs]
     client.add(collection, ids=ids, documents=documents, metadatas=metadatas)
 
 
@@ -1,15 +1,49 @@
 from __future__ import annotations
+import asyncio
+import itertools
 import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Iterable, Optional, Tuple, List, Dict, Any
 import re
 import tempfile
 import json
 
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except Exception:  # pragma: no cover
+    ijson = None  # type: ignore
+
+_VIOL_RE = re.compile(r"Found\s+(\d+)\s+violations", re.I)
+
+# Resolved once per process; PATH lookups are not free and the answer doesn't change mid-run
+_KICAD_CLI = shutil.which("kicad-cli") or shutil.which("kicad-sch")
+
+# JSON reports land in one per-process directory that is removed at exit
+_REPORT_DIR: Optional[tempfile.TemporaryDirectory] = None
+_REPORT_SEQ = itertools.count()
+_REPORT_LOCK = threading.Lock()
+
+# Default head size for streamed reports; beyond it violations are only counted.
+# Callers that summarize more pass their own max_items.
+_REPORT_MAX_ITEMS = 50
+
+ErcResult = Tuple[Optional[subprocess.CompletedProcess], Optional[Dict[str, Any]], Optional[str]]
+
+
+def _report_path(schematic_path: Path) -> str:
+    global _REPORT_DIR
+    with _REPORT_LOCK:
+        if _REPORT_DIR is None:
+            _REPORT_DIR = tempfile.TemporaryDirectory(prefix="erc-")
+    return str(Path(_REPORT_DIR.name) / f"{schematic_path.stem}-{next(_REPORT_SEQ)}.json")
+
 
 def run_erc(schematic_path: Path) -> Optional[subprocess.CompletedProcess]:
-    exe = shutil.which("kicad-cli") or shutil.which("kicad-sch")
+    exe = _KICAD_CLI
     if not exe:
         return None
     try:
@@ -26,7 +60,7 @@ def run_erc(schematic_path: Path) -> Optional[subprocess.CompletedProcess]:
 def parse_erc_violations(output_text: str) -> int:
     if not output_text:
         return 0
-    m = re.search(r"Found\s+(\d+)\s+violations", output_text, flags=re.I)
+    m = _VIOL_RE.search(output_text)
     if m:
         try:
             return int(m.group(1))
@@ -35,37 +69,106 @@ def parse_erc_violations(output_text: str) -> int:
     return 0
 
 
-def run_erc_with_json(schematic_path: Path) -> Tuple[Optional[subprocess.CompletedProcess], Optional[Dict[str, Any]], Optional[str]]:
-    exe = shutil.which("kicad-cli") or shutil.which("kicad-sch")
+def _stream_report(tmp_file: str, max_items: int) -> Dict[str, Any]:
+    # Materialize the first max_items violations; the rest are counted from parser
+    # events without building their objects.
+    head: List[Any] = []
+    count = 0
+    builder = None
+    with open(tmp_file, "rb") as fh:
+        for prefix, event, value in ijson.parse(fh, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == "violations.item" and event in ("end_map", "end_array"):
+                    head.append(builder.value)
+                    builder = None
+            elif prefix == "violations.item" and event not in ("map_key", "end_map", "end_array"):
+                count += 1
+                if len(head) < max_items:
+                    if event in ("start_map", "start_array"):
+                        builder = ObjectBuilder()
+                        builder.event(event, value)
+                    else:
+                        head.append(value)
+    return {"violations": head, "violation_count": count}
+
+
+def _read_report(tmp_file: Optional[str], max_items: int) -> Optional[Dict[str, Any]]:
+    try:
+        if tmp_file and Path(tmp_file).exists():
+            if ijson is not None:
+                return _stream_report(tmp_file, max_items)
+            return json.loads(Path(tmp_file).read_text(encoding="utf-8", errors="ignore"))
+    except Exception:
+        pass
+    return None
+
+
+def erc_violation_count(data: Optional[Dict[str, Any]]) -> int:
+    # Streamed reports carry only the head of the list plus the total
+    if not data:
+        return 0
+    if "violation_count" in data:
+        return int(data["violation_count"])
+    return len(data.get("violations") or [])
+
+
+def run_erc_with_json(schematic_path: Path, max_items: int = _REPORT_MAX_ITEMS) -> ErcResult:
+    exe = _KICAD_CLI
     if not exe:
         return None, None, None
     tmp_file = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp:
-            tmp_file = tmp.name
+        tmp_file = _report_path(schematic_path)
         proc = subprocess.run(
             [exe, "sch", "erc", str(schematic_path), "--format", "json", "--report", tmp_file],
             capture_output=True,
             text=True,
             check=False,
         )
-        data = None
-        try:
-            if tmp_file and Path(tmp_file).exists():
-                data = json.loads(Path(tmp_file).read_text(encoding="utf-8", errors="ignore"))
-        except Exception:
-            data = None
-        return proc, data, tmp_file
+        return proc, _read_report(tmp_file, max_items), tmp_file
+    except Exception:
+        return None, None, tmp_file
+
+
+async def run_erc_with_json_async(schematic_path: Path, max_items: int = _REPORT_MAX_ITEMS) -> ErcResult:
+    # Same contract as run_erc_with_json, but waits on kicad-cli without holding a thread
+    exe = _KICAD_CLI
+    if not exe:
+        return None, None, None
+    tmp_file = None
+    try:
+        tmp_file = _report_path(schematic_path)
+        args = [exe, "sch", "erc", str(schematic_path), "--format", "json", "--report", tmp_file]
+        aproc = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        out, err = await aproc.communicate()
+        proc = subprocess.CompletedProcess(
+            args,
+            aproc.returncode,
+            stdout=out.decode("utf-8", errors="ignore"),
+            stderr=err.decode("utf-8", errors="ignore"),
+        )
+        return proc, _read_report(tmp_file, max_items), tmp_file
     except Exception:
         return None, None, tmp_file
 
 
+def run_erc_batch(schematic_paths: Iterable[Path], max_items: int = _REPORT_MAX_ITEMS) -> List[ErcResult]:
+    # kicad-cli runs out of process, so a couple of threads are enough to keep two going at once
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="erc") as pool:
+        return list(pool.map(lambda p: run_erc_with_json(p, max_items), schematic_paths))
+
+
 def summarize_erc_json(data: Dict[str, Any], max_items: int = 10) -> List[str]:
+    # A streamed report (ijson installed) only holds the max_items the run_erc_with_json*
+    # call asked for, so request at least as many there as are listed here
     lines: List[str] = []
     if not data:
         return lines
     violations = data.get("violations") or []
-    lines.append(f"ERC JSON violations: {len(violations)}")
+    lines.append(f"ERC JSON violations: {erc_violation_count(data)}")
     for v in violations[:max_items]:
         sev = v.get("severity", "?")
         msg = v.get("message", "")
@@ -1,49 +1,67 @@
 from __future__ import annotations
+import os
 from pathlib import Path
-from typing import TextIO
-from uuid import uuid4
+from typing import List
 from core.models import GeneratedDesign
 
 
+_URAND = os.urandom
+
+
+def _uuid_hex() -> str:
+    # RFC 4122 version-4 UUID straight from urandom, without building a uuid.UUID
+    b = bytearray(_URAND(16))
+    b[6] = (b[6] & 0x0F) | 0x40
+    b[8] = (b[8] & 0x3F) | 0x80
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+_HEADER_TMPL = (
+    "(kicad_sch (version 20211014) (generator \"schematic-agent\")\n"
+    "  (paper \"A4\")\n"
+    "  (title_block\n"
+    "    (title \"{title}\")\n"
+    "  )\n"
+)
+_PROPERTY_TMPL = "    (property \"{name}\" \"{value}\" (id {pid}) (at {x} {y} 0) (effects (font (size 1.27 1.27))))\n"
+_SYMBOL_TMPL = (
+    "  (symbol (lib_id \"{symbol}\")\n"
+    "    (at {x} {y} {rot})\n"
+    "    (unit 1) (in_bom yes) (on_board yes)\n"
+    "    (uuid {uuid})\n"
+    "{ref_prop}"
+    "{val_prop}"
+    "  )\n"
+)
+_FOOTER = ")\n"
+
+
 class KiCadSchematicGenerator:
-    def _write_header(self, f: TextIO, title: str) -> None:
-        f.write("(kicad_sch (version 20211014) (generator \"schematic-agent\")\n")
-        f.write("  (paper \"A4\")\n")
-        f.write("  (title_block\n")
-        f.write(f"    (title \"{title}\")\n")
-        f.write("  )\n")
-
-    def _write_property(self, f: TextIO, name: str, value: str, x: int, y: int, pid: int) -> None:
-        f.write(
-            f"    (property \"{name}\" \"{value}\" (id {pid}) (at {x} {y} 0) (effects (font (size 1.27 1.27))))\n"
-        )
+    def _header(self, title: str) -> str:
+        return _HEADER_TMPL.format(title=title)
 
-    def _write_symbol(self, f: TextIO, ref: str, symbol: str, value: str | None, x: int, y: int, rot: int) -> None:
-        u = str(uuid4())
-        f.write(
-            "  (symbol (lib_id \"%s\")\n" % symbol
-        )
-        f.write(
-            "    (at %d %d %d)\n" % (x, y, rot)
-        )
-        f.write("    (unit 1) (in_bom yes) (on_board yes)\n")
-        f.write(f"    (uuid {u})\n")
-        self._write_property(f, "Reference", ref, x, y - 5, 0)
-        if value:
-            self._write_property(f, "Value", value, x, y + 5, 1)
-        f.write("  )\n")
+    def _property(self, name: str, value: str, x: int, y: int, pid: int) -> str:
+        return _PROPERTY_TMPL.format(name=name, value=value, pid=pid, x=x, y=y)
 
-    def _write_footer(self, f: TextIO) -> None:
-        f.write(")\n")
+    def _symbol(self, ref: str, symbol: str, value: str | None, x: int, y: int, rot: int) -> str:
+        return _SYMBOL_TMPL.format(
+            symbol=symbol,
+            x=x,
+            y=y,
+            rot=rot,
+            uuid=_uuid_hex(),
+            ref_prop=self._property("Reference", ref, x, y - 5, 0),
+            val_prop=self._property("Value", value, x, y + 5, 1) if value else "",
+        )
 
     def write_schematic(self, design: GeneratedDesign, out_path: Path) -> None:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        with out_path.open("w", encoding="utf-8") as f:
-            self._write_header(f, design.title)
-            for part in design.parts:
-                x, y = part.position
-                self._write_symbol(
-                    f,
+        # Assemble the whole file in memory and hand it to the OS in one write
+        buf: List[str] = [self._header(design.title)]
+        for part in design.parts:
+            x, y = part.position
+            buf.append(
+                self._symbol(
                     ref=part.ref,
                     symbol=part.symbol,
                     value=part.value,
@@ -51,6 +69,8 @@ class KiCadSchematicGenerator:
                     y=y,
                     rot=part.rotation or 0,
                 )
-            # Note: wires/labels are not emitted in this minimal generator
-            self._write_footer(f)
-
+            )
+        # Note: wires/labels are not emitted in this minimal generator
+        buf.append(_FOOTER)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text("".join(buf), encoding="utf-8")
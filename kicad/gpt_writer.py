@@ -1,25 +1,65 @@
 from __future__ import annotations
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import hashlib
 import json
+import time
+from core import jsonio
 from tools.openai_client import LLMClient
 
+_MAX_COMPLETION_TOKENS = 7000
+_CACHE_TTL_S = 24 * 3600
+
+
+def _is_schematic(text: str) -> bool:
+    text = text.strip()
+    return text.startswith("(kicad_sch") and text.endswith(")")
+
 
 class GptSchematicWriter:
-    def __init__(self, model: Optional[str] = None):
+    def __init__(self, model: Optional[str] = None, no_cache: bool = False, cache_ttl_s: int = _CACHE_TTL_S):
         self.llm = LLMClient(model=model)
-        self._history: List[dict] = []  # capped to last 10 messages
+        self.no_cache = no_cache
+        self.cache_ttl_s = cache_ttl_s
+        self._history: Deque[dict] = deque(maxlen=10)  # oldest messages fall off on append
         self._iter_counter: int = 0
         self._debug_dir: Optional[Path] = None
+        self._cache_dir: Optional[Path] = None
+        # The spec is the same object on every iteration; serialize it once
+        self._cached_spec: Any = None
+        self._cached_spec_fragment: str = ""
+        self._cached_allowed: Optional[Dict[str, List[str]]] = None
+        self._cached_allowed_fragment: str = ""
 
     def _add_history(self, role: str, content: str) -> None:
         self._history.append({"role": role, "content": content})
-        if len(self._history) > 10:
-            self._history = self._history[-10:]
+
+    def _cache_lookup(self, prompt_hash: str) -> Optional[Tuple[str, str]]:
+        if not self._cache_dir:
+            return None
+        try:
+            entry = jsonio.loads((self._cache_dir / f"{prompt_hash}.json").read_bytes())
+            if entry["ts"] < time.time() - self.cache_ttl_s:
+                return None
+            return entry["parsed"], entry["raw"]
+        except Exception:
+            return None
+
+    def _cache_store(self, prompt_hash: str, parsed_text: str, raw_reply: str) -> None:
+        if not self._cache_dir:
+            return
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            (self._cache_dir / f"{prompt_hash}.json").write_text(
+                jsonio.dumps({"parsed": parsed_text, "raw": raw_reply, "ts": int(time.time())}), encoding="utf-8"
+            )
+        except Exception:
+            pass
 
     def _build_prompt(
         self,
-        spec_json_text: str,
+        spec: Any,
         allowed_by_ref: Dict[str, List[str]],
         prev_text: Optional[str],
         issues: Optional[List[str]],
@@ -39,37 +79,42 @@ class GptSchematicWriter:
             "- STRICTLY follow the provided template schema if given: replicate header, section order, nesting, and formatting. Do not change section names or hierarchy.\n"
             "- Apply engineering drawing practices: readable spacing, avoid overlaps, consistent orientation.\n"
         )
-        try:
-            raw = json.loads(spec_json_text)
-        except Exception:
-            raw = {"raw": spec_json_text[:4000]}
-        payload = {
-            "lld_json": raw,
-            "allowed": allowed_by_ref,
-            "refs": list(allowed_by_ref.keys()),
-        }
+        if self._cached_spec is None or spec is not self._cached_spec:
+            self._cached_spec = spec
+            self._cached_spec_fragment = jsonio.dumps(spec)
+        # The orchestrator hands over the same allowed dict every iteration and never mutates it
+        if self._cached_allowed is None or allowed_by_ref is not self._cached_allowed:
+            self._cached_allowed = allowed_by_ref
+            self._cached_allowed_fragment = jsonio.dumps(
+                {"allowed": allowed_by_ref, "refs": list(allowed_by_ref.keys())}
+            )[1:-1]
+        payload: Dict[str, Any] = {}
         if prev_text:
             payload["previous_text"] = prev_text[:12000]
         if issues:
             payload["issues_to_fix"] = issues[:100]
         if reference_text:
             payload["reference_schematic"] = reference_text[:20000]
-        user = json.dumps(payload)
+        # Same bytes as dumping {"lld_json": spec, "allowed": ..., "refs": ..., **payload};
+        # only the per-iteration fields are serialized here.
+        parts = ['{"lld_json":', self._cached_spec_fragment, ",", self._cached_allowed_fragment]
+        if payload:
+            parts += [",", jsonio.dumps(payload)[1:-1]]
+        parts.append("}")
+        user = "".join(parts)
         return system, user
 
-    def generate_text(
+    def _prepare_messages(
         self,
-        spec_json_text: str,
+        spec: Any,
         allowed_by_ref: Dict[str, List[str]],
-        prev_text: Optional[str] = None,
-        issues: Optional[List[str]] = None,
-        reference_text: Optional[str] = None,
-    ) -> Tuple[str, str]:
-        system, user = self._build_prompt(spec_json_text, allowed_by_ref, prev_text, issues, reference_text)
+        prev_text: Optional[str],
+        issues: Optional[List[str]],
+        reference_text: Optional[str],
+    ) -> Tuple[List[dict], str]:
+        system, user = self._build_prompt(spec, allowed_by_ref, prev_text, issues, reference_text)
         self._add_history("user", user)
-        messages: List[dict] = []
-        messages.extend(self._history)
-        messages.insert(0, {"role": "system", "content": system})
+        messages: List[dict] = [{"role": "system", "content": system}, *self._history]
 
         # dump prompt for debugging
         try:
@@ -81,16 +126,25 @@ class GptSchematicWriter:
         except Exception:
             pass
 
+        # Identical requests (same model, token budget, spec, allowed lists, issues and
+        # history) replay the stored reply
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{self.llm.model}\0{_MAX_COMPLETION_TOKENS}\0".encode("utf-8"))
+        for m in messages:
+            h.update(m["role"].encode("utf-8"))
+            h.update(b"\0")
+            h.update(m["content"].encode("utf-8"))
+            h.update(b"\0")
+        return messages, h.hexdigest()
+
+    def _record_error(self, e: Exception) -> None:
         try:
-            reply = self.llm.chat(messages, max_completion_tokens=7000)
-        except Exception as e:
-            reply = ""
-            try:
-                if self._debug_dir:
-                    (self._debug_dir / f"iter_{self._iter_counter:02d}_error.txt").write_text(repr(e), encoding="utf-8")
-            except Exception:
-                pass
+            if self._debug_dir:
+                (self._debug_dir / f"iter_{self._iter_counter:02d}_error.txt").write_text(repr(e), encoding="utf-8")
+        except Exception:
+            pass
 
+    def _parse_reply(self, reply: str, prompt_hash: str) -> Tuple[str, str]:
         if not reply:
             return "", ""
         self._add_history("assistant", reply)
@@ -98,8 +152,54 @@ class GptSchematicWriter:
         start = reply.find("(kicad_sch")
         end = reply.rfind(")")
         if start != -1 and end != -1 and end > start:
-            return reply[start : end + 1], reply
-        return reply.strip(), reply
+            parsed = reply[start : end + 1]
+        else:
+            parsed = reply.strip()
+        # Refusals and other non-schematic replies must not be replayed on the next run
+        if _is_schematic(parsed):
+            self._cache_store(prompt_hash, parsed, reply)
+        return parsed, reply
+
+    def generate_text(
+        self,
+        spec: Any,
+        allowed_by_ref: Dict[str, List[str]],
+        prev_text: Optional[str] = None,
+        issues: Optional[List[str]] = None,
+        reference_text: Optional[str] = None,
+    ) -> Tuple[str, str]:
+        messages, prompt_hash = self._prepare_messages(spec, allowed_by_ref, prev_text, issues, reference_text)
+        cached = self._cache_lookup(prompt_hash)
+        if cached is not None:
+            self._add_history("assistant", cached[1])
+            return cached
+        try:
+            # Replies are cached per output dir, so skip the client's own cache
+            reply = self.llm.chat(messages, max_completion_tokens=_MAX_COMPLETION_TOKENS, cache_control=True, no_cache=True)
+        except Exception as e:
+            reply = ""
+            self._record_error(e)
+        return self._parse_reply(reply, prompt_hash)
+
+    async def agenerate_text(
+        self,
+        spec: Any,
+        allowed_by_ref: Dict[str, List[str]],
+        prev_text: Optional[str] = None,
+        issues: Optional[List[str]] = None,
+        reference_text: Optional[str] = None,
+    ) -> Tuple[str, str]:
+        messages, prompt_hash = self._prepare_messages(spec, allowed_by_ref, prev_text, issues, reference_text)
+        cached = self._cache_lookup(prompt_hash)
+        if cached is not None:
+            self._add_history("assistant", cached[1])
+            return cached
+        try:
+            reply = await self.llm.achat(messages, max_completion_tokens=_MAX_COMPLETION_TOKENS, cache_control=True, no_cache=True)
+        except Exception as e:
+            reply = ""
+            self._record_error(e)
+        return self._parse_reply(reply, prompt_hash)
 
     def _seed_schematic(self, title: str) -> str:
         return (
@@ -109,24 +209,14 @@ class GptSchematicWriter:
             ")\n" % (title or "Untitled")
         )
 
-    def write(
-        self,
-        spec_json_text: str,
-        allowed_by_ref: Dict[str, List[str]],
-        out_path: Path,
-        prev_text: Optional[str] = None,
-        issues: Optional[List[str]] = None,
-        reference_text: Optional[str] = None,
-    ) -> None:
+    def _begin_write(self, out_path: Path) -> None:
         # configure debug dir
         self._iter_counter += 1
         self._debug_dir = out_path.parent / "gpt_debug"
         self._debug_dir.mkdir(parents=True, exist_ok=True)
+        self._cache_dir = None if self.no_cache else out_path.parent / ".gpt_cache"
 
-        parsed_text, raw_reply = self.generate_text(
-            spec_json_text, allowed_by_ref, prev_text=prev_text, issues=issues, reference_text=reference_text
-        )
-
+    def _finish_write(self, parsed_text: str, raw_reply: str, out_path: Path, prev_text: Optional[str]) -> str:
         # debug dump
         try:
             if self._debug_dir:
@@ -134,12 +224,43 @@ class GptSchematicWriter:
         except Exception:
             pass
 
-        if parsed_text.strip().startswith("(kicad_sch") and parsed_text.strip().endswith(")"):
-            out_path.parent.mkdir(parents=True, exist_ok=True)
-            out_path.write_text(parsed_text, encoding="utf-8")
+        if _is_schematic(parsed_text):
+            text = parsed_text
+        elif prev_text and prev_text.strip():
+            text = prev_text
         else:
-            if prev_text and prev_text.strip():
-                out_path.write_text(prev_text, encoding="utf-8")
-            else:
-                seed = self._seed_schematic(title="Untitled")
-                out_path.write_text(seed, encoding="utf-8")
+            text = self._seed_schematic(title="Untitled")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(text, encoding="utf-8")
+        # Hand the text back so callers don't have to re-read the file
+        return text
+
+    def write(
+        self,
+        spec: Any,
+        allowed_by_ref: Dict[str, List[str]],
+        out_path: Path,
+        prev_text: Optional[str] = None,
+        issues: Optional[List[str]] = None,
+        reference_text: Optional[str] = None,
+    ) -> str:
+        self._begin_write(out_path)
+        parsed_text, raw_reply = self.generate_text(
+            spec, allowed_by_ref, prev_text=prev_text, issues=issues, reference_text=reference_text
+        )
+        return self._finish_write(parsed_text, raw_reply, out_path, prev_text)
+
+    async def awrite(
+        self,
+        spec: Any,
+        allowed_by_ref: Dict[str, List[str]],
+        out_path: Path,
+        prev_text: Optional[str] = None,
+        issues: Optional[List[str]] = None,
+        reference_text: Optional[str] = None,
+    ) -> str:
+        self._begin_write(out_path)
+        parsed_text, raw_reply = await self.agenerate_text(
+            spec, allowed_by_ref, prev_text=prev_text, issues=issues, reference_text=reference_text
+        )
+        return self._finish_write(parsed_text, raw_reply, out_path, prev_text)
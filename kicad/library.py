@@ -1,12 +1,25 @@
 from __future__ import annotations
+import functools
+import hashlib
+import mmap
 import os
+import pickle
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Set, Iterable, Optional, List, Tuple
+from typing import Dict, FrozenSet, Iterable, Optional, List, Tuple
+
+import numpy as np
 
 
 SYMBOL_FILE_EXT = ".kicad_sym"
 
+# Symbol names: lines like (symbol "R" ...); matched on raw bytes so files are never decoded
+_SYM_RE = re.compile(rb'\(symbol\s+"([^"]+)"')
+
+# Symbol files are small and independent, so reading them is latency-bound rather than CPU-bound
+_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
 
 def _candidate_symbol_dirs() -> Iterable[Path]:
     env_dir = os.getenv("KICAD_SYMBOLS_DIR")
@@ -40,26 +53,87 @@ def _list_symbol_files(root: Path) -> Iterable[Path]:
             yield path
 
 
-_symbol_cache: Optional[Dict[str, Set[str]]] = None
+# lib nickname -> symbol names; frozen once built since every caller only reads it
+SymbolIndex = Dict[str, FrozenSet[str]]
+
+_symbol_cache: Optional[SymbolIndex] = None
+
+# Parsed indexes persist here across runs, keyed by a signature of the symbol roots
+_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or (Path.home() / ".cache")) / "schematics-agent"
+
+
+def _index_signature(roots: List[Tuple[Path, List[Path]]]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for root, files in roots:
+        mtimes = []
+        for fpath in files:
+            try:
+                mtimes.append(fpath.stat().st_mtime_ns)
+            except OSError:
+                continue
+        h.update(repr((str(root), max(mtimes, default=0), len(files))).encode("utf-8"))
+    return h.hexdigest()
+
+
+# One file, overwritten when the libraries change; the signature is stored inside it
+_INDEX_CACHE_PATH = _CACHE_DIR / "symbols.pkl"
+
+
+def _load_index_cache(cache_path: Path, signature: str) -> Optional[SymbolIndex]:
+    try:
+        with cache_path.open("rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get("signature") != signature or not isinstance(data.get("index"), dict):
+        return None
+    return {lib: frozenset(names) for lib, names in data["index"].items()}
+
+
+def _save_index_cache(cache_path: Path, signature: str, index: SymbolIndex) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump({"signature": signature, "index": index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_path)
+        # Earlier versions wrote one symbols-<signature>.pkl per library state
+        for stale in cache_path.parent.glob("symbols-*.pkl"):
+            stale.unlink(missing_ok=True)
+    except Exception:
+        pass
+
+
+def _parse_one(fpath: Path) -> List[str]:
+    try:
+        with open(fpath, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            names = _SYM_RE.findall(mm)
+    except (OSError, ValueError):
+        # ValueError: empty files cannot be mapped
+        return []
+    return [n.decode("utf-8", "ignore") for n in names]
 
 
-def index_symbols() -> Dict[str, Set[str]]:
+def index_symbols() -> SymbolIndex:
     global _symbol_cache
     if _symbol_cache is not None:
         return _symbol_cache
 
-    index: Dict[str, Set[str]] = {}
-    for sym_dir in _candidate_symbol_dirs():
-        for fpath in _list_symbol_files(sym_dir):
+    roots = [(sym_dir, list(_list_symbol_files(sym_dir))) for sym_dir in _candidate_symbol_dirs()]
+    signature = _index_signature(roots)
+    cached = _load_index_cache(_INDEX_CACHE_PATH, signature)
+    if cached is not None:
+        _symbol_cache = cached
+        return cached
+
+    files = [fpath for _, root_files in roots for fpath in root_files]
+    building: Dict[str, set[str]] = {}
+    with ThreadPoolExecutor(max_workers=_IO_WORKERS) as ex:
+        for fpath, names in zip(files, ex.map(_parse_one, files)):
             lib_nickname = fpath.stem  # e.g., Device.kicad_sym -> Device
-            symbols = index.setdefault(lib_nickname, set())
-            try:
-                text = fpath.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
-            # Extract symbol names: lines like (symbol "R" ...)
-            for m in re.finditer(r"\(symbol\s+\"([^\"]+)\"", text):
-                symbols.add(m.group(1))
+            building.setdefault(lib_nickname, set()).update(names)
+    index = {lib: frozenset(names) for lib, names in building.items()}
+    _save_index_cache(_INDEX_CACHE_PATH, signature, index)
     _symbol_cache = index
     return index
 
@@ -111,15 +185,64 @@ def resolve_lib_id(preferred: str | None, part_type: str, value: str | None = No
     return "Device:Unknown"
 
 
+# Flat, index-aligned arrays over every (lib, name) pair plus trigram postings into
+# them, built once from index_symbols()
+_NGRAM = 3
+_flat_libs: Optional[np.ndarray] = None
+_flat_names: Optional[np.ndarray] = None
+_flat_lower: Optional[np.ndarray] = None
+_ngram_idx: Dict[str, np.ndarray] = {}
+
+
+def _ngram_index() -> None:
+    global _flat_libs, _flat_names, _flat_lower
+    if _flat_lower is not None:
+        return
+    libs: List[str] = []
+    names: List[str] = []
+    postings: Dict[str, List[int]] = {}
+    for lib, syms in index_symbols().items():
+        for name in syms:
+            i = len(names)
+            libs.append(lib)
+            names.append(name)
+            nm = name.lower()
+            for j in range(len(nm) - _NGRAM + 1):
+                postings.setdefault(nm[j : j + _NGRAM], []).append(i)
+    _ngram_idx.update((gram, np.unique(ids)) for gram, ids in postings.items())
+    _flat_libs = np.array(libs, dtype=object)
+    _flat_names = np.array(names, dtype=object)
+    # Fixed-width unicode so np.char.find scans every name in C
+    _flat_lower = np.array([n.lower() for n in names], dtype=str)
+
+
+@functools.lru_cache(maxsize=1024)
+def _search_cached(tokens: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    _ngram_index()
+    postings: List[np.ndarray] = []
+    for tok in tokens:
+        # Tokens shorter than a trigram can't be looked up; they are only verified below
+        for j in range(len(tok) - _NGRAM + 1):
+            posting = _ngram_idx.get(tok[j : j + _NGRAM])
+            if posting is None:
+                return ()
+            postings.append(posting)
+    if postings:
+        postings.sort(key=len)
+        ids = postings[0]
+        for posting in postings[1:]:
+            ids = np.intersect1d(ids, posting, assume_unique=True)
+    else:
+        ids = np.arange(len(_flat_lower))
+    # Trigrams only narrow the field; confirm each token is a real substring
+    for tok in tokens:
+        if not len(ids):
+            return ()
+        ids = ids[np.char.find(_flat_lower[ids], tok) >= 0]
+    return tuple(zip(_flat_libs[ids].tolist(), _flat_names[ids].tolist()))
+
+
 def search_symbols_by_substrings(substrings: List[str]) -> List[Tuple[str, str]]:
-    idx = index_symbols()
     if not substrings:
         return []
-    lowered = [s.lower() for s in substrings if s]
-    results: List[Tuple[str, str]] = []
-    for lib, syms in idx.items():
-        for name in syms:
-            nm = name.lower()
-            if all(tok in nm for tok in lowered):
-                results.append((lib, name))
-    return results
+    return list(_search_cached(tuple(s.lower() for s in substrings if s)))
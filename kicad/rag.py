@@ -1,11 +1,17 @@
 from __future__ import annotations
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from core.models import PartSpec
 from kicad.library import index_symbols, search_symbols_by_substrings
-from tools.chroma_client import ChromaClient
+from tools.chroma_client import get_client
+import functools
 import re
 
 
+# Indexed documents hold one "name: description" line per symbol (see chroma_indexer)
+_SYM_RE = re.compile(r"^(.+?): ", re.M)
+_CUSTOM_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_]+")
+
+
 def _list_if_exists(index: dict, lib: str, symbols: List[str]) -> List[str]:
 	if lib not in index:
 		return []
@@ -14,13 +20,12 @@ def _list_if_exists(index: dict, lib: str, symbols: List[str]) -> List[str]:
 
 def _chroma_search(query: str, n: int = 5) -> List[str]:
 	try:
-		client = ChromaClient()
+		client = get_client()
 		results = client.query("kicad_symbols", query, n_results=n)
-		import re as _re
 		lib_ids: List[str] = []
 		for r in results:
 			doc: str = r.get("document") or ""
-			for m in _re.finditer(r"\(symbol\s+\"([^\"]+)\"", doc):
+			for m in _SYM_RE.finditer(doc):
 				sym = m.group(1)
 				lib = r.get("metadata", {}).get("lib") or ""
 				if lib:
@@ -37,7 +42,7 @@ def _chroma_search(query: str, n: int = 5) -> List[str]:
 
 
 def _sanitize_value_for_custom(value: str) -> str:
-	base = re.sub(r"[^A-Za-z0-9_]+", "_", value.strip())[:48] or "CustomPart"
+	base = _CUSTOM_UNSAFE_RE.sub("_", value.strip())[:48] or "CustomPart"
 	return f"Custom:{base}"
 
 
@@ -58,18 +63,18 @@ def _suggest_from_value(value: str) -> List[str]:
 	return suggestions
 
 
-def candidates_for_part(part: PartSpec, max_per_lib: int = 5) -> List[str]:
+@functools.lru_cache(maxsize=1024)
+def _candidates_cached(ptype: str, ref_prefix: str, value: str, max_per_lib: int) -> Tuple[str, ...]:
+	# Only the part type, the ref's leading letter and the value steer the lookup, so
+	# identical parts (every 10k resistor, every 100nF cap) share one entry.
 	idx = index_symbols()
-	ptype = (part.type or "").upper()
-	ref_id = (part.ref or "").upper()
-	value = (part.value or "").upper()
 
 	candidates: List[str] = []
 
-	if ptype == "R" or ref_id.startswith("R"):
+	if ptype == "R" or ref_prefix == "R":
 		cand = _list_if_exists(idx, "Device", ["R"]) or []
 		candidates.extend(cand[:max_per_lib])
-	elif ptype == "C" or ref_id.startswith("C"):
+	elif ptype == "C" or ref_prefix == "C":
 		cand = _list_if_exists(idx, "Device", ["C"]) or []
 		candidates.extend(cand[:max_per_lib])
 	elif ptype in {"CONN", "CONNECTOR"}:
@@ -80,8 +85,8 @@ def candidates_for_part(part: PartSpec, max_per_lib: int = 5) -> List[str]:
 		cand = _list_if_exists(idx, "Device", ["LED", "D"])
 		candidates.extend(cand[:max_per_lib])
 	else:
-		if part.value:
-			suggestions = _suggest_from_value(part.value)
+		if value:
+			suggestions = _suggest_from_value(value)
 			candidates.extend(suggestions[:max_per_lib])
 
 	# De-dup and cap
@@ -98,14 +103,34 @@ def candidates_for_part(part: PartSpec, max_per_lib: int = 5) -> List[str]:
 				break
 
 	# If still empty, propose a custom symbol name to be embedded
-	if not result:
-		if part.value:
-			result = [_sanitize_value_for_custom(part.value)]
-		else:
-			result = [f"Custom:{ref_id or 'Unknown'}"]
+	if not result and value:
+		result = [_sanitize_value_for_custom(value)]
+
+	return tuple(result)
+
 
+def candidates_for_part(part: PartSpec, max_per_lib: int = 5) -> List[str]:
+	ref_id = (part.ref or "").upper()
+	# Value is kept as given: custom symbol names preserve its case
+	result = list(_candidates_cached((part.type or "").upper(), ref_id[:1], part.value or "", max_per_lib))
+	if not result:
+		result = [f"Custom:{ref_id or 'Unknown'}"]
 	return result
 
 
+_PartKey = Tuple[str, str, Optional[str]]
+
+
+@functools.lru_cache(maxsize=64)
+def _candidates_for_parts_cached(key: Tuple[_PartKey, ...], max_per_lib: int) -> Dict[str, Tuple[str, ...]]:
+	return {
+		ref: tuple(candidates_for_part(PartSpec(ref=ref, type=ptype, value=value), max_per_lib=max_per_lib))
+		for ref, ptype, value in key
+	}
+
+
 def candidates_for_parts(parts: List[PartSpec], max_per_lib: int = 5) -> Dict[str, List[str]]:
-	return {p.ref: candidates_for_part(p, max_per_lib=max_per_lib) for p in parts}
+	# Same parts list -> same answer; avoid re-walking the symbol index and Chroma per call
+	key = tuple((p.ref, p.type or "", p.value) for p in parts)
+	cached = _candidates_for_parts_cached(key, max_per_lib)
+	return {ref: list(cands) for ref, cands in cached.items()}
@@ -9,6 +9,7 @@ def main():
     parser.add_argument("--out-dir", required=False, type=Path, default=Path("output"))
     parser.add_argument("--iters", required=False, type=int, default=3)
     parser.add_argument("--llm-validator", action="store_true", help="Enable GPT-based KiCad 9 compliance checks")
+    parser.add_argument("--no-cache", action="store_true", help="Ask GPT for a fresh schematic instead of replaying cached replies")
     args = parser.parse_args()
 
     sch_file = run_orchestration(
@@ -17,6 +18,7 @@ def main():
         max_iters=args.iters,
         progress_cb=print,
         validator_use_llm=args.llm_validator,
+        no_cache=args.no_cache,
     )
     print("Schematic written to:", sch_file)
 
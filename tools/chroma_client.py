@@ -1,25 +1,47 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Optional
+import functools
+import os
 import chromadb
 
 
 class ChromaClient:
     def __init__(self, persist_dir: str = ".chroma"):
         self.client = chromadb.PersistentClient(path=persist_dir)
+        self._collections: Dict[str, Any] = {}
 
     def get_or_create(self, name: str, metadata: Optional[Dict[str, Any]] = None):
-        safe_metadata = metadata if (metadata and len(metadata) > 0) else {"created_by": "schematic-agent", "collection": name}
-        return self.client.get_or_create_collection(name=name, metadata=safe_metadata)
+        col = self._collections.get(name)
+        if col is None:
+            safe_metadata = metadata if (metadata and len(metadata) > 0) else {"created_by": "schematic-agent", "collection": name}
+            col = self.client.get_or_create_collection(name=name, metadata=safe_metadata)
+            self._collections[name] = col
+        return col
 
     def list_collections(self) -> List[str]:
         return [c.name for c in self.client.list_collections()]
 
     def delete_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
         self.client.delete_collection(name)
 
-    def add(self, collection_name: str, ids: List[str], documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+    def add(
+        self,
+        collection_name: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        batch_size: int = 256,
+    ) -> None:
         col = self.get_or_create(collection_name)
-        col.add(ids=ids, documents=documents, metadatas=metadatas)
+        # Embed and insert in batches so only one batch of vectors is in flight at a time
+        for i in range(0, len(ids), batch_size):
+            j = i + batch_size
+            col.add(
+                ids=ids[i:j],
+                documents=documents[i:j],
+                metadatas=metadatas[i:j] if metadatas is not None else None,
+            )
 
     def query(self, collection_name: str, text: str, n_results: int = 5) -> List[Dict[str, Any]]:
         col = self.get_or_create(collection_name)
@@ -33,3 +55,14 @@ class ChromaClient:
                 "distance": res.get("distances", [[None]])[0][i],
             })
         return results
+
+
+@functools.lru_cache(maxsize=4)
+def _client_for(persist_dir: str) -> ChromaClient:
+    # Opening a PersistentClient loads sqlite and the HNSW index; share one per directory
+    return ChromaClient(persist_dir=persist_dir)
+
+
+def get_client(persist_dir: str = ".chroma") -> ChromaClient:
+    # Normalize so get_client() and get_client(".chroma") hit the same cache entry
+    return _client_for(os.path.abspath(persist_dir))
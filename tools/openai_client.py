@@ -1,27 +1,143 @@
 from __future__ import annotations
+import hashlib
 import os
-from typing import List, Dict, Any
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
 except Exception:  # pragma: no cover
+    AsyncOpenAI = None  # type: ignore
     OpenAI = None  # type: ignore
 
+from core import jsonio
+
 load_dotenv()
 
+_CACHE_TTL_S = 24 * 3600
+
+
+def _default_cache_path() -> Path:
+    base = Path(os.getenv("XDG_CACHE_HOME") or (Path.home() / ".cache"))
+    return Path(os.getenv("LLM_CACHE_PATH") or (base / "schematics-agent" / "llm_cache.sqlite3"))
+
+
+def _prompt_cache_key(messages: List[Dict[str, Any]]) -> str:
+    # Key on the leading system messages only: they are the static prefix the provider can reuse.
+    h = hashlib.blake2b(digest_size=16)
+    for m in messages:
+        if m.get("role") != "system":
+            break
+        h.update(str(m.get("content", "")).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Exact-match reply cache shared across runs. Failures to open or write the database
+# only disable caching; they never fail the call.
+class _ReplyCache:
+    def __init__(self, path: Path, ttl_s: int = _CACHE_TTL_S):
+        self.path = path
+        self.ttl_s = ttl_s
+        # One connection, opened on first use; achat() and to_thread() callers may
+        # reach it from different threads, so access is serialized.
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._disabled:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, reply TEXT NOT NULL, ts INTEGER NOT NULL)"
+                )
+                self._conn = conn
+            except (sqlite3.Error, OSError):
+                self._disabled = True
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT reply FROM llm_cache WHERE key = ? AND ts >= ?",
+                    (key, int(time.time()) - self.ttl_s),
+                ).fetchone()
+            except (sqlite3.Error, OSError):
+                return None
+        return row[0] if row else None
+
+    def put(self, key: str, reply: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, reply, ts) VALUES (?, ?, ?)",
+                        (key, reply, int(time.time())),
+                    )
+                    conn.execute("DELETE FROM llm_cache WHERE ts < ?", (int(time.time()) - self.ttl_s,))
+            except (sqlite3.Error, OSError):
+                pass
+
 
 class LLMClient:
     def __init__(self, model: str | None = None):
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-5")
         self.api_key = os.getenv("OPENAI_API_KEY")
         self._client = OpenAI(api_key=self.api_key) if OpenAI else None
+        self._cache = _ReplyCache(_default_cache_path())
+        # Created on first achat() so it binds to the event loop that uses it
+        self._aclient = None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def chat(self, messages: List[Dict[str, Any]], **kwargs) -> str:
+    def _cache_key(self, params: Dict[str, Any]) -> str:
+        # Everything that shapes the reply goes into the key, not just the messages
+        return hashlib.blake2b(jsonio.dumps(params).encode("utf-8"), digest_size=16).hexdigest()
+
+    def chat(self, messages: List[Dict[str, Any]], no_cache: bool = False, **kwargs) -> str:
         if not self._client:
             return ""  # Offline fallback
+        params = self._params(messages, **kwargs)
+        if no_cache:
+            return self._create(params)
+        key = self._cache_key(params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        reply = self._create(params)
+        if reply:
+            self._cache.put(key, reply)
+        return reply
+
+    async def achat(self, messages: List[Dict[str, Any]], no_cache: bool = False, **kwargs) -> str:
+        if AsyncOpenAI is None:
+            return ""  # Offline fallback
+        if self._aclient is None:
+            self._aclient = AsyncOpenAI(api_key=self.api_key)
+        params = self._params(messages, **kwargs)
+        if no_cache:
+            return await self._acreate(params)
+        key = self._cache_key(params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        reply = await self._acreate(params)
+        if reply:
+            self._cache.put(key, reply)
+        return reply
+
+    def _params(self, messages: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
         params: Dict[str, Any] = {
             "model": self.model,
             "messages": messages,
@@ -36,7 +152,18 @@ class LLMClient:
             params["max_completion_tokens"] = kwargs["max_tokens"]
         else:
             params["max_completion_tokens"] = 1200
+        # OpenAI caches shared prompt prefixes automatically; a stable key routes calls
+        # with the same static system prompt to the same cache.
+        if kwargs.get("cache_control"):
+            params["extra_body"] = {"prompt_cache_key": _prompt_cache_key(messages)}
+        return params
 
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def _create(self, params: Dict[str, Any]) -> str:
         resp = self._client.chat.completions.create(**params)
         return resp.choices[0].message.content or ""
 
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def _acreate(self, params: Dict[str, Any]) -> str:
+        resp = await self._aclient.chat.completions.create(**params)
+        return resp.choices[0].message.content or ""